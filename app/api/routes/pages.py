@@ -1,18 +1,55 @@
 from __future__ import annotations
 
+import gzip
+
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import pass_context
+from jinja2.runtime import Context
+
+
+@pass_context
+def static_url(context: Context, path: str) -> str:
+    """``url_for('static', path=...)`` plus the asset's ``?v=`` fingerprint, so it can be cached."""
+    request: Request = context["request"]
+    url = request.url_for("static", path=path)
+    version = request.app.state.static_assets.versions.get("/" + path.lstrip("/"))
+    return str(url.include_query_params(v=version) if version else url)
+
 
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
 router = APIRouter()
 
+# Resolved once; TemplateResponse would look the template up by name on every request
+_index_tpl = templates.env.get_template("index.html")
+# The page only varies with the base URL (url_for emits absolute links), so keep the encoded
+# body, plain and gzipped, per base URL; the bound keeps spoofed Host headers from growing it.
+_index_pages: dict[str, tuple[bytes, bytes]] = {}
+_INDEX_PAGES_MAX = 16
+_INDEX_HEADERS = {"cache-control": "public, max-age=3600", "vary": "accept-encoding"}
+# GZipMiddleware passes responses that already carry a content-encoding through untouched
+_INDEX_GZIP_HEADERS = {**_INDEX_HEADERS, "content-encoding": "gzip"}
+
 
 @router.get("/", response_class=HTMLResponse)
 def index(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    base_url = str(request.base_url)
+    page = _index_pages.get(base_url)
+    if page is None:
+        body = _index_tpl.render(request=request).encode("utf-8")
+        # Compressed once, so the slowest level costs nothing per request
+        page = (body, gzip.compress(body, compresslevel=9))
+        if len(_index_pages) < _INDEX_PAGES_MAX:
+            _index_pages[base_url] = page
+    # A fresh response around the shared bytes: GZipMiddleware edits the headers it is given
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return HTMLResponse(page[1], headers=_INDEX_GZIP_HEADERS)
+    return HTMLResponse(page[0], headers=_INDEX_HEADERS)
 
 
 @router.get("/health", response_class=PlainTextResponse)
 def health():
-    return PlainTextResponse("ok")
+    # A fresh response per call: middleware may edit the headers of the instance it is given
+    return PlainTextResponse(b"ok")
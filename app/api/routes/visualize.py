@@ -1,17 +1,73 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import threading
+
+from anyio import CapacityLimiter, to_thread
 from fastapi import APIRouter, Form, HTTPException
 from fastapi.responses import HTMLResponse
-from rdflib import Graph
 
 from app.core.config import settings
 from app.services.graph_viz import visualize_rdflib_graph_to_html
+from app.services.turtle import TripleLimitExceeded, parse_turtle
 
 router = APIRouter(tags=["visualize"])
 
+# Dedicated budget so heavy renders cannot exhaust the threadpool shared by other sync work
+_render_limiter = CapacityLimiter(settings.max_concurrent_renders)
+
+# Hands the Turtle text to _render_cached on a miss, so the cache key stays a 16-byte digest.
+# Thread-local because concurrent requests may share a digest.
+_current = threading.local()
+
+
+def _render(turtle: str, include_literals: bool, community_algo: str) -> str:
+    try:
+        g = parse_turtle(turtle, settings.max_triples)
+    except TripleLimitExceeded as e:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Turtle exceeds {settings.max_triples} triples.",
+        ) from e
+    except Exception as e:
+        # Keep message terse for UX; detailed logs can carry full exception.
+        raise HTTPException(status_code=400, detail=f"Parse error: {e}") from e
+
+    return visualize_rdflib_graph_to_html(
+        graph=g,
+        include_literals=include_literals,
+        bgcolor=settings.theme_bgcolor,
+        fontcolor=settings.theme_fontcolor,
+        community_algo=community_algo,
+        turtle=turtle,
+        physics_max_nodes=settings.physics_max_nodes,
+        min_nodes_for_community=settings.min_nodes_for_community,
+        leiden_warm_start_edges=settings.leiden_warm_start_edges,
+    )
+
+
+@functools.lru_cache(maxsize=settings.render_cache_size)
+def _render_cached(
+    turtle_digest: bytes,  # noqa: ARG001 - only the lru_cache key; the text comes via _current
+    include_literals: bool,
+    community_algo: str,
+) -> str:
+    # Rendering is deterministic (seeded community detection), so the digest fully identifies the page
+    return _render(_current.turtle, include_literals, community_algo)
+
+
+def _render_memoized(turtle: str, include_literals: bool, community_algo: str) -> str:
+    digest = hashlib.blake2b(turtle.encode("utf-8"), digest_size=16).digest()
+    _current.turtle = turtle
+    try:
+        return _render_cached(digest, include_literals, community_algo)
+    finally:
+        del _current.turtle
+
 
 @router.post("/visualize", response_class=HTMLResponse)
-def visualize(
+async def visualize(
     turtle: str = Form(...),
     include_literals: bool = Form(True),
     community_algo: str = Form("leiden"),
@@ -24,18 +80,8 @@ def visualize(
             detail=f"Turtle exceeds {settings.max_turtle_chars} characters.",
         )
 
-    try:
-        g = Graph()
-        g.parse(data=turtle, format="turtle")
-    except Exception as e:
-        # Keep message terse for UX; detailed logs can carry full exception.
-        raise HTTPException(status_code=400, detail=f"Parse error: {e}") from e
-
-    html = visualize_rdflib_graph_to_html(
-        graph=g,
-        include_literals=include_literals,
-        bgcolor=settings.theme_bgcolor,
-        fontcolor=settings.theme_fontcolor,
-        community_algo=community_algo,
+    # Parsing, community detection and rendering are CPU-bound; keep them off the event loop
+    html = await to_thread.run_sync(
+        _render_memoized, turtle, include_literals, community_algo, limiter=_render_limiter
     )
     return HTMLResponse(html)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +12,13 @@ class Settings(BaseSettings):
     allowed_hosts: list[str] = ["*"]  # adjust in prod (e.g., ["turtlyscope.example.org"])
     cors_origins: list[AnyHttpUrl] = []  # set if used cross-origin
     max_turtle_chars: int = 250_000  # guardrails for input size
+    max_triples: int = 50_000  # parsing aborts past this many statements
+    max_concurrent_renders: int = os.cpu_count() or 1  # cap on parallel /api/visualize renders
+    render_cache_size: int = 32  # rendered pages kept per worker (up to ~4.3 MB each, ~140 MB total)
+    physics_max_nodes: int = 500  # larger graphs start with a static layout instead of physics
+    min_nodes_for_community: int = 20  # smaller graphs skip community detection
+    leiden_warm_start_edges: int = 10_000  # larger graphs seed Leiden with label propagation
+    gzip_level: int = 4  # GZipMiddleware zlib level (Starlette defaults to 9)
     theme_bgcolor: str = "#0b1020"  # forwarded to PyVis
     theme_fontcolor: str = "#e7ecf5"
 
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        resp: Response = await call_next(request)
-        # Note: PyVis uses inline scripts; CSP below allows it for the visualization page.
-        resp.headers.setdefault("X-Content-Type-Options", "nosniff")
-        resp.headers.setdefault("X-Frame-Options", "DENY")
-        resp.headers.setdefault("Referrer-Policy", "no-referrer")
-        # Loosened CSP due to PyVis 'in_line' resources; scope route-level CSP if you tighten later.
-        resp.headers.setdefault(
-            "Content-Security-Policy",
-            "default-src 'self' data: blob:; img-src 'self' data: blob:; "
-            "style-src 'self' 'unsafe-inline'; script-src 'self' 'unsafe-inline';",
-        )
-        return resp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Note: PyVis uses inline scripts; CSP below allows it for the visualization page.
+_SECURITY_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"referrer-policy", b"no-referrer"),
+    # Loosened CSP due to PyVis 'in_line' resources; scope route-level CSP if you tighten later.
+    (
+        b"content-security-policy",
+        (
+            b"default-src 'self' data: blob:; img-src 'self' data: blob:; "
+            b"style-src 'self' 'unsafe-inline'; script-src 'self' 'unsafe-inline';"
+        ),
+    ),
+)
+
+
+class SecurityHeadersMiddleware:
+    """Plain ASGI middleware: adds the headers on ``http.response.start`` unless the app set them.
+
+    Unlike ``BaseHTTPMiddleware`` it does not wrap the response in a memory stream and task group.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                present = {name.lower() for name, _ in headers}
+                headers.extend(h for h in _SECURITY_HEADERS if h[0] not in present)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
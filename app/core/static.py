@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from starlette.types import Receive, Scope, Send
+
+# Only URLs carrying the asset's current ``?v=`` fingerprint may be cached forever; any other
+# URL must be revalidated against the ETag, or a deploy could leave browsers on stale files.
+_CACHE_FOREVER = b"public, max-age=31536000, immutable"
+_CACHE_REVALIDATE = b"no-cache"
+
+
+class StaticAssets:
+    """ASGI app serving every file under ``directory`` from memory.
+
+    The directory is read once at construction; each request is a dict lookup plus an ETag compare,
+    with no ``stat``/``open`` per hit like ``StaticFiles`` does. ``versions`` maps each path to
+    the content fingerprint that templates append as ``?v=`` (see ``static_url``).
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        root = Path(directory)
+        self.assets: dict[str, tuple[bytes, bytes, bytes]] = {}
+        self.versions: dict[str, str] = {}
+        for file in sorted(root.rglob("*")):
+            if not file.is_file():
+                continue
+            body = file.read_bytes()
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            etag = f'"{digest}"'.encode()
+            content_type = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+            path = "/" + file.relative_to(root).as_posix()
+            self.assets[path] = (body, etag, content_type.encode())
+            self.versions[path] = digest[:12]
+
+    async def __call__(self, scope: Scope, _receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            raise RuntimeError(f"StaticAssets only serves HTTP, got a {scope['type']!r} scope")
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send(send, 405, b"Method Not Allowed", [(b"allow", b"GET, HEAD")])
+            return
+        # Mount leaves the full path in scope["path"] and appends its prefix to root_path.
+        path = scope["path"].removeprefix(scope.get("root_path", ""))
+        asset = self.assets.get(path)
+        if asset is None:
+            await self._send(send, 404, b"Not Found")
+            return
+
+        body, etag, content_type = asset
+        fingerprinted = scope["query_string"] == b"v=" + self.versions[path].encode()
+        cache_control = _CACHE_FOREVER if fingerprinted else _CACHE_REVALIDATE
+        headers = [(b"etag", etag), (b"cache-control", cache_control)]
+        if_none_match = self._header(scope, b"if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            await self._send(send, 304, b"", headers, content_type=None)
+            return
+        await self._send(
+            send, 200, b"" if scope["method"] == "HEAD" else body, headers, content_type, len(body)
+        )
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> bytes | None:
+        for key, value in scope["headers"]:
+            if key == name:
+                return value
+        return None
+
+    @staticmethod
+    async def _send(
+        send: Send,
+        status: int,
+        body: bytes,
+        headers: list[tuple[bytes, bytes]] | None = None,
+        content_type: bytes | None = b"text/plain; charset=utf-8",
+        content_length: int | None = None,
+    ) -> None:
+        headers = list(headers or ())
+        if content_type is not None:
+            headers.append((b"content-type", content_type))
+        if status != 304:
+            length = len(body) if content_length is None else content_length
+            headers.append((b"content-length", str(length).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    if if_none_match.strip() == b"*":
+        return True
+    return any(tag.strip().removeprefix(b"W/") == etag for tag in if_none_match.split(b","))
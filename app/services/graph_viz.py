@@ -1,20 +1,25 @@
 from __future__ import annotations
 
-import pathlib
-from pydoc import html
-import re
-import tempfile
-
+from collections.abc import Callable
+import contextlib
+import functools
+import json
+import math
+import random
+import string
+import threading
+from typing import Any
+
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import escape
 from pyvis.network import Network
 from rdflib import BNode, Graph, Literal, URIRef
 from rdflib.namespace import NamespaceManager
-from rdflib.extras.external_graph_libs import rdflib_to_networkx_digraph
 import networkx as nx
 from networkx.algorithms.community import (
     louvain_communities,
     asyn_lpa_communities,
     greedy_modularity_communities,
-    quality,
 )
 
 try:
@@ -23,6 +28,20 @@ try:
 except Exception:  # noqa: BLE001
     HAS_LEIDEN = False
 
+try:
+    import igraph as ig
+    HAS_IGRAPH = True
+except ImportError:
+    HAS_IGRAPH = False
+
+_IGRAPH_RNG_LOCK = threading.Lock()
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 # --- Presentation fragments moved from templates into service boundary where needed ---
 
 THEME_CSS = """
@@ -86,55 +105,317 @@ HEADER_HTML = """
 """
 
 
-def _qname_or_str(g: Graph, term: URIRef | BNode | Literal | str) -> str:
+def _qname_or_str(normalize: Callable[[str], str], term: URIRef | BNode | Literal | str) -> str:
+    """``normalize`` is the graph's ``NamespaceManager.normalizeUri`` (or a memoized wrapper of it)."""
     if isinstance(term, Literal):
         if term.language:
             return f'"{term}"@{term.language}'
         if term.datatype:
-            nm: NamespaceManager = g.namespace_manager
             try:
-                dt = nm.normalizeUri(term.datatype)
+                dt = normalize(term.datatype)
             except Exception:  # noqa: BLE001
                 dt = str(term.datatype)
             return f'"{term}"^^{dt}'
         return f'"{term}"'
     if isinstance(term, (URIRef, BNode)):
         try:
-            return g.namespace_manager.normalizeUri(term)
+            return normalize(term)
         except Exception:  # noqa: BLE001
             return str(term)
     return str(term)
 
 
-def _apply_theme_to_pyvis_html(pyvis_html: str, toolbar_right_extra: str = "") -> str:
-    # 1) Insert CSS in <head>
-    themed = re.sub(
-        r"<head(.*?)>",
-        lambda m: f"<head{m.group(1)}>{THEME_CSS}",
-        pyvis_html,
-        count=1,
-        flags=re.I | re.S,
-    )
-    # 2) Inject header + frame at top of <body>
-    inject_top = f"""
+# Header + frame injected at the top of <body>; the toolbar controls go in between.
+_INJECT_TOP_START = (
+    """
     <div class="wrap">
-      {HEADER_HTML}
+      """
+    + HEADER_HTML
+    + """
       <div class="card">
         <div class="toolbar">
           <a class="btn" href="/">← Back to Home</a>
           <span class="hint">Tip: pan with drag, zoom with wheel</span>
           <span style="margin-left:auto"></span>
-          {toolbar_right_extra}
+          """
+)
+_INJECT_TOP_END = """
         </div>
     """
-    themed = re.sub(
-        r"<body(.*?)>",
-        lambda m: f"<body{m.group(1)}>{inject_top}",
-        themed,
-        count=1,
-        flags=re.I | re.S,
+
+PYVIS_OPTIONS: dict[str, Any] = {
+    "physics": {
+        "forceAtlas2Based": {
+            "gravitationalConstant": -100,
+            "centralGravity": 0.01,
+            "springLength": 200,
+            "springConstant": 0.08,
+        },
+        "minVelocity": 0.75,
+        "solver": "forceAtlas2Based",
+    },
+    "nodes": {"font": {"multi": "md"}},
+}
+# Serialized once; the JSON text doubles as the shell cache key
+_PYVIS_OPTIONS_JSON = json.dumps(PYVIS_OPTIONS)
+# Large graphs: nodes arrive pre-positioned, so skip the force simulation and straight-line the edges
+_PYVIS_STATIC_OPTIONS_JSON = json.dumps(
+    {
+        **PYVIS_OPTIONS,
+        "physics": {**PYVIS_OPTIONS["physics"], "enabled": False},
+        "edges": {"smooth": False},
+    }
+)
+
+# Toolbar controls; string.Template keeps the inline JS free of doubled braces
+_CONTROLS_TEMPLATE = string.Template(
+    """
+    <div style="display:flex; align-items:center; gap:.5rem;">
+      <label for="algo-select" class="hint">Community algorithm</label>
+      <select id="algo-select" class="btn" style="min-width:12rem;">
+        <option value="louvain" $sel_louvain>Louvain</option>
+        <option value="leiden" $sel_leiden>Leiden</option>
+        <option value="label_propagation" $sel_label_propagation>Label Propagation</option>
+        <option value="greedy_modularity" $sel_greedy_modularity>Greedy Modularity</option>
+        <option value="none" $sel_none>None</option>
+      </select>
+      <button type="button" id="physics-toggle" class="btn"
+              data-enabled="$physics_enabled">Physics: $physics_label</button>
+      <span class="hint"> Communities: <b>$k</b> • Modularity: <b>$mod_str</b> • used: <b>$algo_used</b></span>
+
+      <!-- Hidden state: serialized Turtle + include_literals -->
+      <textarea id="__ttl" style="display:none;">$ttl_escaped</textarea>
+      <input type="hidden" id="__include_literals" value="$include_literals" />
+    </div>
+
+    <script>
+    (function(){
+      const sel = document.getElementById('algo-select');
+      const ttl = document.getElementById('__ttl');
+      const inc = document.getElementById('__include_literals');
+      async function reRender() {
+        const fd = new FormData();
+        fd.append('turtle', ttl.value);
+        fd.append('include_literals', inc.value === 'true' ? 'on' : '');  // FastAPI parses checkbox-like values
+        fd.append('community_algo', sel.value);
+        try {
+          const resp = await fetch('/api/visualize', { method: 'POST', body: fd });
+          const html = await resp.text();
+          document.open(); document.write(html); document.close();
+        } catch (e) {
+          alert('Failed to re-render: ' + e);
+        }
+      }
+      sel.addEventListener('change', reRender);
+
+      const phys = document.getElementById('physics-toggle');
+      phys.addEventListener('click', function () {
+        const on = phys.dataset.enabled !== 'true';
+        network.setOptions({ physics: { enabled: on } });
+        phys.dataset.enabled = String(on);
+        phys.textContent = 'Physics: ' + (on ? 'on' : 'off');
+      });
+    }())</script>
+    """
+)
+
+# Markers around the payload arrays in PyVis' template.html
+_NODES_MARKER = "nodes = new vis.DataSet("
+_EDGES_MARKER = "edges = new vis.DataSet("
+_TOOLBAR_SLOT = "<!--turtlyscope:toolbar-->"
+
+
+def _apply_theme_to_pyvis_html(pyvis_html: str, toolbar_right_extra: str = "") -> str:
+    # The PyVis template is fixed, so plain string searches are enough to find the splice points.
+    head_end = pyvis_html.index(">", pyvis_html.index("<head")) + 1
+    body_end = pyvis_html.index(">", pyvis_html.index("<body", head_end)) + 1
+    body_close = pyvis_html.rfind("</body>")
+    if body_close < body_end:
+        body_close = len(pyvis_html)
+    return "".join(
+        (
+            pyvis_html[:head_end],
+            THEME_CSS,
+            pyvis_html[head_end:body_end],
+            _INJECT_TOP_START,
+            toolbar_right_extra,
+            _INJECT_TOP_END,
+            pyvis_html[body_end:body_close],
+            "</div></div>",
+            pyvis_html[body_close:],
+        )
+    )
+
+
+def _split_at_payload(html: str, marker: str) -> tuple[str, str]:
+    start = html.index(marker) + len(marker)
+    return html[:start], html[html.index(");", start) :]
+
+
+@functools.lru_cache(maxsize=8)
+def _pyvis_shell(
+    bgcolor: str, fontcolor: str, options_json: str, many_nodes: bool, tooltip_link: bool
+) -> tuple[str, str, str, str]:
+    """Render and theme the PyVis page once, split around the toolbar and the node/edge arrays.
+
+    Only the toolbar controls and the two JSON arrays vary per request; ``many_nodes`` feeds
+    the template's ``nodes|length > 100`` switch for the stabilization loading bar, and
+    ``tooltip_link`` the link-friendly popup PyVis uses when a node title contains "href".
+    """
+    net = Network(
+        height="100%",
+        width="100%",
+        bgcolor=bgcolor,
+        font_color=fontcolor,
+        cdn_resources="in_line",
+    )
+    # Assigned directly; set_options would strip whitespace and re-parse the text
+    net.options = json.loads(options_json)
+    if many_nodes:
+        net.nodes = [{"id": i} for i in range(101)]
+    if tooltip_link:
+        net.nodes = net.nodes or [{"id": 0}]
+        net.nodes[0]["title"] = "href"
+
+    raw = net.generate_html(notebook=False)
+    themed = _apply_theme_to_pyvis_html(raw, toolbar_right_extra=_TOOLBAR_SLOT)
+    head, rest = themed.split(_TOOLBAR_SLOT, 1)
+    before_nodes, rest = _split_at_payload(rest, _NODES_MARKER)
+    between, rest = _split_at_payload(rest, _EDGES_MARKER)
+    return head, before_nodes, between, rest
+
+
+def _dumps_js(obj: object) -> str:
+    """JSON for embedding in a <script> block, escaped like Jinja's ``tojson`` filter."""
+    if HAS_ORJSON:
+        try:
+            text = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # orjson rejects lone surrogates (e.g. a literal written as "\uD800"); the stdlib escapes them
+            pass
+        else:
+            return (
+                text.replace("<", "\\u003c")
+                .replace(">", "\\u003e")
+                .replace("&", "\\u0026")
+                .replace("'", "\\u0027")
+            )
+    return str(htmlsafe_json_dumps(obj, sort_keys=True))
+
+
+def _render_pyvis_html(
+    nodes: list[dict],
+    edges: list[dict],
+    toolbar_right_extra: str,
+    bgcolor: str,
+    fontcolor: str,
+    options_json: str,
+) -> str:
+    head, before_nodes, between, tail = _pyvis_shell(
+        bgcolor,
+        fontcolor,
+        options_json,
+        len(nodes) > 100,
+        any("href" in n.get("title", "") for n in nodes),
+    )
+    return "".join(
+        (
+            head,
+            toolbar_right_extra,
+            before_nodes,
+            _dumps_js(nodes),
+            between,
+            _dumps_js(edges),
+            tail,
+        )
     )
-    return re.sub(r"</body>", "</div></div></body>", themed, count=1, flags=re.I | re.S)
+
+
+@contextlib.contextmanager
+def _igraph_seed(seed: int):
+    """igraph draws from a process-wide RNG; pin it so partitions are reproducible."""
+    with _IGRAPH_RNG_LOCK:
+        # Seeds igraph's community search, nothing security-related
+        ig.set_random_number_generator(random.Random(seed))  # nosec B311
+        try:
+            yield
+        finally:
+            ig.set_random_number_generator(random)
+
+
+def _igraph_communities(
+    n: int, edges: list[tuple[int, int]], community_algo: str, warm_start_edges: int
+) -> tuple[list[int], int, float]:
+    """Leiden and Louvain (multilevel) through igraph's C implementations.
+
+    Above ``warm_start_edges`` (simple) edges Leiden starts from a label-propagation partition.
+    Returns the membership list indexed by vertex id, the community count and the modularity.
+    """
+    ig_g = ig.Graph(n=n, edges=edges, directed=False)
+    # Collapse parallel edges like nx.Graph does, self-loops are kept
+    ig_g.simplify(multiple=True, loops=False)
+    with _igraph_seed(42):
+        if community_algo == "leiden" and ig_g.ecount() > warm_start_edges:
+            # Label propagation is near-linear and already close to a good partition, so two
+            # refinement sweeps suffice instead of iterating to convergence
+            seed = ig_g.community_label_propagation()
+            partition = ig_g.community_leiden(
+                objective_function="modularity",
+                resolution=1.0,
+                n_iterations=2,
+                initial_membership=seed.membership,
+            )
+        elif community_algo == "leiden":
+            # n_iterations=-1 iterates until the partition is stable
+            partition = ig_g.community_leiden(
+                objective_function="modularity", resolution=1.0, n_iterations=-1
+            )
+        else:
+            partition = ig_g.community_multilevel(resolution=1.0)
+    return partition.membership, len(partition), partition.modularity
+
+
+def _modularity(edges: list[tuple[int, int]], membership: list[int]) -> float:
+    """Unweighted Newman modularity (resolution 1) for the simple graph on ``edges``.
+
+    Parallel edges count once and a self-loop adds 2 to its node's degree, as in ``nx.Graph``.
+    """
+    unique = {(u, v) if u <= v else (v, u) for u, v in edges}
+    m = len(unique)
+    intra: dict[int, int] = {}
+    degree_sum: dict[int, int] = {}
+    for u, v in unique:
+        cu = membership[u]
+        cv = membership[v]
+        degree_sum[cu] = degree_sum.get(cu, 0) + 1
+        degree_sum[cv] = degree_sum.get(cv, 0) + 1
+        if cu == cv:
+            intra[cu] = intra.get(cu, 0) + 1
+    two_m = 2 * m
+    return sum(intra.get(c, 0) / m - (d / two_m) ** 2 for c, d in degree_sum.items())
+
+
+def _static_layout(nodes: list[dict], spacing: float = 40.0) -> None:
+    """Give every node an ``x``/``y`` so vis.js can draw it without running physics.
+
+    Each group (community) is packed into a sunflower disc and the discs themselves are
+    spread along a golden-angle spiral, largest first. Deterministic and O(n).
+    """
+    groups: dict[str, list[dict]] = {}
+    for node in nodes:
+        groups.setdefault(node["group"], []).append(node)
+
+    golden = math.pi * (3 - math.sqrt(5))
+    placed = 0
+    for i, members in enumerate(sorted(groups.values(), key=len, reverse=True)):
+        n = len(members)
+        dist = 2 * spacing * math.sqrt(placed + n / 2) if i else 0.0
+        cx, cy = dist * math.cos(i * golden), dist * math.sin(i * golden)
+        for k, node in enumerate(members):
+            r = spacing * math.sqrt(k)
+            node["x"] = round(cx + r * math.cos(k * golden), 1)
+            node["y"] = round(cy + r * math.sin(k * golden), 1)
+        placed += n
 
 
 def visualize_rdflib_graph_to_html(
@@ -143,58 +424,108 @@ def visualize_rdflib_graph_to_html(
     bgcolor: str = "#0b1020",
     fontcolor: str = "#e7ecf5",
     community_algo: str = "leiden",
+    turtle: str | None = None,
+    physics_max_nodes: int = 500,
+    min_nodes_for_community: int = 20,
+    leiden_warm_start_edges: int = 10_000,
 ) -> str:
-    # --- Compute communities on an NX view of the RDF graph ---
-    nx_dg = rdflib_to_networkx_digraph(graph)
-    G_u = nx_dg.to_undirected()
+    """Render ``graph`` as a themed PyVis page.
 
-    comms: list[set] | None = None
+    ``turtle`` is the source the graph was parsed from. When given it is embedded as-is for
+    client-side re-rendering, which saves serializing the graph back to Turtle.
+    Above ``physics_max_nodes`` nodes the page starts with physics off and a precomputed layout.
+    Community detection is skipped for graphs with fewer than ``min_nodes_for_community`` nodes.
+    Past ``leiden_warm_start_edges`` edges igraph's Leiden is seeded with label propagation.
+    """
+    # --- Compute communities on an integer view of the RDF graph ---
+    # Walk the rdflib store once, directly rather than through Graph.triples' generator;
+    # the PyVis pass below replays this list.
+    triples = [t for t, _ in graph.store.triples((None, None, None), context=graph)]
+    # Only an undirected, unweighted edge list is needed for community detection. Terms get
+    # dense ids on first sight so igraph/NetworkX hash small ints instead of rdflib terms.
+    ids: dict[object, int] = {}
+    intern = ids.setdefault
+    if include_literals:
+        pairs = [(intern(s, len(ids)), intern(o, len(ids))) for s, _, o in triples]
+    else:
+        # Hidden literals are leaves that would only skew the partition, so leave their edges
+        # out; the subject is still drawn, so it keeps an id even if all its objects are literals
+        pairs = []
+        for s, _, o in triples:
+            sid = intern(s, len(ids))
+            if not isinstance(o, Literal):
+                pairs.append((sid, intern(o, len(ids))))
+    n_terms = len(ids)
+
+    comms: list | None = None
     algo_used = "none"
-    try:
-        if community_algo == "leiden":
-            if HAS_LEIDEN:
-                comms = list(leiden_communities(G_u, weight=None, resolution=1.0, seed=42))
-                algo_used = "leiden"
-            else:
-                comms = list(louvain_communities(G_u, weight=None, resolution=1.0, seed=42))
-                algo_used = "louvain (fallback)"
-        elif community_algo == "louvain":
-            comms = list(louvain_communities(G_u, weight=None, resolution=1.0, seed=42))
-            algo_used = "louvain"
-        elif community_algo == "label_propagation":
-            comms = list(asyn_lpa_communities(G_u, weight=None, seed=42))
-            algo_used = "label_propagation"
-        elif community_algo == "greedy_modularity":
-            comms = list(greedy_modularity_communities(G_u, weight=None, resolution=1.0))
-            algo_used = "greedy_modularity"
-        else:
-            comms = None
-            algo_used = "none"
-    except Exception:
-        comms = None
-        algo_used = "none"
-
-    node_to_comm: dict[object, int] = {}
-    if comms:
-        for cid, cset in enumerate(comms):
-            for n in cset:
-                node_to_comm[n] = cid
-
     modularity = None
-    if comms:
+    # Community of each interned term, indexed by its id
+    membership: list[int] | None = None
+    k = 0
+    # Nothing to detect for "none", and tiny graphs gain nothing visually from grouping
+    if community_algo != "none" and n_terms >= min_nodes_for_community:
         try:
-            modularity = quality.modularity(G_u, comms, weight=None)
+            if HAS_IGRAPH and community_algo in ("leiden", "louvain"):
+                membership, k, modularity = _igraph_communities(
+                    n_terms, pairs, community_algo, leiden_warm_start_edges
+                )
+                algo_used = community_algo
+            elif community_algo in ("leiden", "louvain", "label_propagation", "greedy_modularity"):
+                G_u = nx.Graph()
+                # Isolated ids need a vertex too, or they fall back to community 0 below
+                G_u.add_nodes_from(range(n_terms))
+                G_u.add_edges_from(pairs)
+                if community_algo == "leiden":
+                    if HAS_LEIDEN:
+                        comms = list(leiden_communities(G_u, weight=None, resolution=1.0, seed=42))
+                        algo_used = "leiden"
+                    else:
+                        comms = list(louvain_communities(G_u, weight=None, resolution=1.0, seed=42))
+                        algo_used = "louvain (fallback)"
+                elif community_algo == "louvain":
+                    comms = list(louvain_communities(G_u, weight=None, resolution=1.0, seed=42))
+                    algo_used = "louvain"
+                elif community_algo == "label_propagation":
+                    comms = list(asyn_lpa_communities(G_u, weight=None, seed=42))
+                    algo_used = "label_propagation"
+                else:
+                    comms = list(greedy_modularity_communities(G_u, weight=None, resolution=1.0))
+                    algo_used = "greedy_modularity"
         except Exception:
+            comms = None
+            algo_used = "none"
             modularity = None
+            membership = None
+            k = 0
+
+        # NetworkX returns sets of ids; igraph already gave a membership list and its modularity
+        if comms:
+            membership = [0] * n_terms
+            for cid, members in enumerate(comms):
+                for i in members:
+                    membership[i] = cid
+            k = len(comms)
+            try:
+                modularity = _modularity(pairs, membership)
+            except Exception:
+                modularity = None
 
-    # --- Build the PyVis network; color via 'group' per community ---
-    net = Network(
-        height="100%",
-        width="100%",
-        bgcolor=bgcolor,
-        font_color=fontcolor,
-        cdn_resources="in_line",
-    )
+        # Modularity is undefined without edges (igraph reports NaN, _modularity 0); show "—"
+        if not pairs:
+            modularity = None
+
+    # --- Build the PyVis node/edge payload; color via 'group' per community ---
+    # Same dicts Network.add_node/add_edge would produce, without their per-call
+    # validation and the linear duplicate-edge scan.
+    font = {"color": fontcolor} if fontcolor else None
+    nodes: list[dict] = []
+    edges: list[dict] = []
+    seen_edges: set[tuple[str, str]] = set()
+
+    # Predicates and datatypes repeat across triples; resolve each IRI's qname only once
+    nm: NamespaceManager = graph.namespace_manager
+    normalize = functools.cache(nm.normalizeUri)
 
     node_ids: dict[object, str] = {}
     lit_counter = 0
@@ -202,114 +533,94 @@ def visualize_rdflib_graph_to_html(
     def _make_literal_id(lit: Literal) -> str:
         nonlocal lit_counter
         lit_counter += 1
-        return f"lit:{lit_counter}"
+        # The space keeps it distinct from every IRI/BNode id (``<lit:1>`` is a valid IRI);
+        # vis.js rejects the whole DataSet on a duplicate id
+        return f"lit {lit_counter}"
 
     def add_node(term):
-        if term in node_ids:
-            return node_ids[term]
-        comm_group = node_to_comm.get(term, None)
+        tid = ids.get(term) if membership is not None else None
+        comm_group = membership[tid] if tid is not None else None
         group = f"C{comm_group}" if comm_group is not None else ("BNode" if isinstance(term, BNode) else "IRI")
         if isinstance(term, Literal):
             node_id = _make_literal_id(term)
-            net.add_node(
-                node_id,
-                label=_qname_or_str(graph, term),
-                title=f"Literal\nvalue={term}\ndatatype={getattr(term, 'datatype', None)}\nlang={getattr(term, 'language', None)}"
-                      + (f"\ncommunity=C{comm_group}" if comm_group is not None else ""),
-                shape="box",
-                group=f"C{comm_group}" if comm_group is not None else "Literal",
-            )
+            node = {
+                "id": node_id,
+                "label": _qname_or_str(normalize, term) or node_id,
+                "title": f"Literal\nvalue={term}\ndatatype={getattr(term, 'datatype', None)}\nlang={getattr(term, 'language', None)}"
+                + (f"\ncommunity=C{comm_group}" if comm_group is not None else ""),
+                "shape": "box",
+                "group": f"C{comm_group}" if comm_group is not None else "Literal",
+            }
         else:
             node_id = str(term)
-            net.add_node(
-                node_id,
-                label=_qname_or_str(graph, term),
-                title=f"{'BNode' if isinstance(term, BNode) else 'IRI'}\n{term}"
-                      + (f"\ncommunity=C{comm_group}" if comm_group is not None else ""),
-                group=group,
-            )
+            node = {
+                "id": node_id,
+                "label": _qname_or_str(normalize, term) or node_id,
+                "title": f"{'BNode' if isinstance(term, BNode) else 'IRI'}\n{term}"
+                + (f"\ncommunity=C{comm_group}" if comm_group is not None else ""),
+                "shape": "dot",
+                "group": group,
+            }
+        if font:
+            node["font"] = font
+        append_node(node)
         node_ids[term] = node_id
         return node_id
 
-    for s, p, o in graph.triples((None, None, None)):
-        sid = add_node(s)
-        if isinstance(o, (URIRef, BNode)) or include_literals:
-            oid = add_node(o)
-            net.add_edge(sid, oid, label=_qname_or_str(graph, p), title=str(p))
-
-    net.set_options(
-        """
-    {
-      "physics": {
-        "forceAtlas2Based": {
-          "gravitationalConstant": -100,
-          "centralGravity": 0.01,
-          "springLength": 200,
-          "springConstant": 0.08
-        },
-        "minVelocity": 0.75,
-        "solver": "forceAtlas2Based"
-      },
-      "nodes": { "font": {"multi": "md"} }
-    }"""
-    )
-
-    # Render PyVis to HTML string
-    with tempfile.TemporaryDirectory() as tmpdir:
-        out = pathlib.Path(tmpdir) / "graph.html"
-        net.write_html(str(out), open_browser=False, notebook=False)
-        raw = out.read_text(encoding="utf-8")
+    # Hot loop: bind the bound methods once; known terms skip the add_node call entirely
+    # (node ids are never empty, so ``or`` only falls through for unseen terms)
+    append_node = nodes.append
+    append_edge = edges.append
+    mark_edge = seen_edges.add
+    known_id = node_ids.get
+    # Few distinct predicates label many edges; format each one's label and title once
+    edge_text: dict[object, tuple[str, str]] = {}
+    for s, p, o in triples:
+        sid = known_id(s) or add_node(s)
+        if include_literals or isinstance(o, (URIRef, BNode)):
+            oid = known_id(o) or add_node(o)
+            # PyVis keeps a single edge per unordered node pair in undirected networks
+            key = (sid, oid) if sid <= oid else (oid, sid)
+            if key not in seen_edges:
+                mark_edge(key)
+                text = edge_text.get(p)
+                if text is None:
+                    text = edge_text[p] = (_qname_or_str(normalize, p), str(p))
+                append_edge({"from": sid, "to": oid, "label": text[0], "title": text[1]})
 
     # --- Embed the original graph (as Turtle) + controls so user can switch algorithms ---
-    ttl_text = graph.serialize(format="turtle")
-    if not isinstance(ttl_text, str):
-        ttl_text = ttl_text.decode("utf-8", errors="replace")
-    ttl_escaped = html.escape(ttl_text)
+    if turtle is not None:
+        ttl_text = turtle
+    else:
+        ttl_text = graph.serialize(format="turtle")
+        if not isinstance(ttl_text, str):
+            ttl_text = ttl_text.decode("utf-8", errors="replace")
+    ttl_escaped = escape(ttl_text)
 
     # Selected option helper
     def _sel(val: str) -> str:
         return "selected" if community_algo == val else ""
 
     mod_str = f"{modularity:.0%}" if isinstance(modularity, (int, float)) else "—"
-    k = len(comms) if comms else 0
-
-    controls = f"""
-    <div style="display:flex; align-items:center; gap:.5rem;">
-      <label for="algo-select" class="hint">Community algorithm</label>
-      <select id="algo-select" class="btn" style="min-width:12rem;">
-        <option value="louvain" {_sel('louvain')}>Louvain</option>
-        <option value="leiden" {_sel('leiden')}>Leiden</option>
-        <option value="label_propagation" {_sel('label_propagation')}>Label Propagation</option>
-        <option value="greedy_modularity" {_sel('greedy_modularity')}>Greedy Modularity</option>
-        <option value="none" {_sel('none')}>None</option>
-      </select>
-      <span class="hint"> Communities: <b>{k}</b> • Modularity: <b>{mod_str}</b> • used: <b>{html.escape(algo_used)}</b></span>
-
-      <!-- Hidden state: serialized Turtle + include_literals -->
-      <textarea id="__ttl" style="display:none;">{ttl_escaped}</textarea>
-      <input type="hidden" id="__include_literals" value="{str(bool(include_literals)).lower()}" />
-    </div>
 
-    <script>
-    (function(){{
-      const sel = document.getElementById('algo-select');
-      const ttl = document.getElementById('__ttl');
-      const inc = document.getElementById('__include_literals');
-      async function reRender() {{
-        const fd = new FormData();
-        fd.append('turtle', ttl.value);
-        fd.append('include_literals', inc.value === 'true' ? 'on' : '');  // FastAPI parses checkbox-like values
-        fd.append('community_algo', sel.value);
-        try {{
-          const resp = await fetch('/api/visualize', {{ method: 'POST', body: fd }});
-          const html = await resp.text();
-          document.open(); document.write(html); document.close();
-        }} catch (e) {{
-          alert('Failed to re-render: ' + e);
-        }}
-      }}
-      sel.addEventListener('change', reRender);
-    }}())</script>
-    """
+    physics_enabled = len(nodes) <= physics_max_nodes
+    if not physics_enabled:
+        _static_layout(nodes)
+
+    controls = _CONTROLS_TEMPLATE.substitute(
+        sel_louvain=_sel("louvain"),
+        sel_leiden=_sel("leiden"),
+        sel_label_propagation=_sel("label_propagation"),
+        sel_greedy_modularity=_sel("greedy_modularity"),
+        sel_none=_sel("none"),
+        k=k,
+        mod_str=mod_str,
+        algo_used=escape(algo_used),
+        ttl_escaped=ttl_escaped,
+        include_literals=str(bool(include_literals)).lower(),
+        physics_enabled=str(physics_enabled).lower(),
+        physics_label="on" if physics_enabled else "off",
+    )
 
-    return _apply_theme_to_pyvis_html(raw, toolbar_right_extra=controls)
\ No newline at end of file
+    options_json = _PYVIS_OPTIONS_JSON if physics_enabled else _PYVIS_STATIC_OPTIONS_JSON
+    return _render_pyvis_html(nodes, edges, controls, bgcolor, fontcolor, options_json)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+try:
+    import pyoxigraph as ox
+    HAS_OXIGRAPH = True
+except ImportError:
+    HAS_OXIGRAPH = False
+
+# Relative IRIs resolve against this instead of rdflib's default, the server's working directory
+BASE_IRI = "https://turtlyscope.invalid/"
+
+_XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+
+
+class TripleLimitExceeded(ValueError):
+    """Raised while parsing once the input yields more triples than allowed."""
+
+
+class _BoundedGraph(Graph):
+    """Graph that aborts the parse as soon as the parser emits more than ``max_triples`` statements."""
+
+    def __init__(self, max_triples: int, **kwargs):
+        super().__init__(**kwargs)
+        self._remaining = max_triples
+
+    def add(self, triple):
+        self._remaining -= 1
+        if self._remaining < 0:
+            raise TripleLimitExceeded
+        return super().add(triple)
+
+
+def _parse_with_oxigraph(g: _BoundedGraph, turtle: str) -> None:
+    """Fill ``g`` from pyoxigraph's Rust Turtle parser, converting terms as rdflib's parser would."""
+    # IRIs repeat across triples; build each rdflib term once
+    terms: dict[object, URIRef | BNode | Literal] = {}
+
+    def convert(term):
+        node = terms.get(term)
+        if node is None:
+            if isinstance(term, ox.NamedNode):
+                node = URIRef(term.value)
+            elif isinstance(term, ox.BlankNode):
+                node = BNode(term.value)
+            elif isinstance(term, ox.Triple):
+                # rdflib's parser rejects RDF 1.2 syntax too; fail the same way rather than mid-convert
+                raise ValueError("RDF 1.2 triple terms (<< ... >>) are not supported")
+            elif term.direction is not None:
+                raise ValueError(f"directional language tags (@{term.language}--...) are not supported")
+            elif term.language:
+                node = Literal(term.value, lang=term.language)
+            else:
+                # rdflib leaves plain literals untyped where RDF 1.1 says xsd:string
+                datatype = term.datatype.value
+                node = Literal(term.value, datatype=None if datatype == _XSD_STRING else URIRef(datatype))
+            terms[term] = node
+        return node
+
+    parser = ox.parse(turtle, format=ox.RdfFormat.TURTLE, base_iri=BASE_IRI)
+    add = g.add
+    for quad in parser:
+        add((convert(quad.subject), convert(quad.predicate), convert(quad.object)))
+    # Prefixes are only complete once the whole document has been read
+    for prefix, namespace in parser.prefixes.items():
+        g.bind(prefix, namespace)
+
+
+def parse_turtle(turtle: str, max_triples: int) -> Graph:
+    # The parser pushes each statement through Graph.add, so oversized inputs are rejected
+    # before the store and its indexes grow past the limit.
+    g = _BoundedGraph(max_triples)
+    if HAS_OXIGRAPH:
+        _parse_with_oxigraph(g, turtle)
+    else:
+        g.parse(data=turtle, format="turtle", publicID=BASE_IRI)
+    return g
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import re
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app.api.routes.visualize import _render_cached
+from app.core.config import settings
 from app.main import app
+from app.services import turtle
 
 client = TestClient(app)
 
@@ -11,6 +17,9 @@ def test_health():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.text == "ok"
+    assert r.headers["x-content-type-options"] == "nosniff"
+    assert r.headers["x-frame-options"] == "DENY"
+    assert "content-security-policy" in r.headers
 
 
 def test_visualize_bad_input():
@@ -19,9 +28,153 @@ def test_visualize_bad_input():
     assert "Parse error" in r.json()["detail"]
 
 
+def test_visualize_too_many_triples(monkeypatch):
+    monkeypatch.setattr(settings, "max_triples", 2)
+    ttl = "@prefix ex: <http://example.org/> . ex:a ex:b ex:c , ex:d , ex:e ."
+    r = client.post("/api/visualize", data={"turtle": ttl})
+    assert r.status_code == 413
+    assert "triples" in r.json()["detail"]
+
+
 def test_visualize_ok():
     ttl = "@prefix ex: <http://example.org/> . ex:a ex:b ex:c ."
     r = client.post("/api/visualize", data={"turtle": ttl})
     assert r.status_code == 200
     assert "<html" in r.text.lower()
     assert "vis-network" in r.text
+    # Below min_nodes_for_community nodes no detection runs
+    assert "used: <b>none</b>" in r.text
+
+
+def test_visualize_href_titles_use_link_tooltips():
+    ttl = "<http://example.org/href> <http://example.org/p> <http://example.org/o> ."
+    r = client.post("/api/visualize", data={"turtle": ttl})
+    assert r.status_code == 200
+    assert "div.popup" in r.text
+
+
+def test_visualize_literal_ids_never_clash_with_iris():
+    r = client.post("/api/visualize", data={"turtle": '<lit:1> <http://example.org/p> "x" .'})
+    assert r.status_code == 200
+    assert len(re.findall(r'"id": ?"lit:1"', r.text)) == 1
+
+
+def test_visualize_lone_surrogate_literal(monkeypatch):
+    # rdflib's parser accepts the escape; the payload must still serialize
+    monkeypatch.setattr(turtle, "HAS_OXIGRAPH", False)
+    ttl = '<http://example.org/a> <http://example.org/p> "x\\uD800y" .'
+    r = client.post("/api/visualize", data={"turtle": ttl})
+    assert r.status_code == 200
+    assert "\\ud800" in r.text
+
+
+@pytest.mark.skipif(not turtle.HAS_OXIGRAPH, reason="rdflib's parser rejects this syntax outright")
+@pytest.mark.parametrize(
+    "obj",
+    ['"x"@en--ltr', "<<( <http://example.org/s> <http://example.org/p> <http://example.org/o> )>>"],
+)
+def test_visualize_rejects_rdf12_terms(obj):
+    ttl = f"<http://example.org/a> <http://example.org/p> {obj} ."
+    r = client.post("/api/visualize", data={"turtle": ttl})
+    assert r.status_code == 400
+    assert "not supported" in r.json()["detail"]
+
+
+def test_visualize_relative_iris_use_fixed_base():
+    r = client.post("/api/visualize", data={"turtle": "<a> <b> <c> ."})
+    assert r.status_code == 200
+    assert "https://turtlyscope.invalid/a" in r.text
+    assert "file://" not in r.text
+
+
+@pytest.mark.parametrize("algo", ["leiden", "louvain", "label_propagation", "greedy_modularity"])
+def test_visualize_community_algos(algo):
+    ttl = "@prefix ex: <http://example.org/> .\n" + "\n".join(
+        f"ex:n{i} ex:p ex:n{(i + 1) % 40} , ex:n{(i * 7) % 40} ." for i in range(40)
+    )
+    r = client.post("/api/visualize", data={"turtle": ttl, "community_algo": algo})
+    assert r.status_code == 200
+    assert f"used: <b>{algo}</b>" in r.text
+
+
+@pytest.mark.parametrize("algo", ["leiden", "label_propagation"])
+def test_visualize_literal_only_subject_gets_community(algo):
+    # With literals hidden, a subject whose only objects are literals is still a drawn node
+    ttl = "@prefix ex: <http://example.org/> .\n" + "\n".join(
+        f"ex:m{i} ex:p ex:m{(i + 1) % 30} ." for i in range(30)
+    ) + '\nex:lonely ex:label "x" .'
+    r = client.post(
+        "/api/visualize", data={"turtle": ttl, "include_literals": "false", "community_algo": algo}
+    )
+    assert r.status_code == 200
+    assert "http://example.org/lonely\\ncommunity=C" in r.text
+
+
+@pytest.mark.parametrize("algo", ["leiden", "louvain", "label_propagation"])
+def test_visualize_edgeless_community_graph(algo):
+    # Hidden literals leave only isolated subjects, where modularity is undefined
+    ttl = "@prefix ex: <http://example.org/> .\n" + "\n".join(
+        f'ex:e{i} ex:label "{i}" .' for i in range(25)
+    )
+    r = client.post(
+        "/api/visualize", data={"turtle": ttl, "include_literals": "false", "community_algo": algo}
+    )
+    assert r.status_code == 200
+    assert "Modularity: <b>—</b>" in r.text
+
+
+def test_visualize_leiden_warm_start(monkeypatch):
+    monkeypatch.setattr(settings, "leiden_warm_start_edges", 0)
+    ttl = "@prefix ex: <http://example.org/> .\n" + "\n".join(
+        f"ex:w{i} ex:p ex:w{(i + 1) % 45} , ex:w{(i * 7) % 45} ." for i in range(45)
+    )
+    r = client.post("/api/visualize", data={"turtle": ttl, "community_algo": "leiden"})
+    assert r.status_code == 200
+    assert "used: <b>leiden</b>" in r.text
+
+
+def test_index():
+    r = client.get("/")
+    assert r.status_code == 200
+    assert 'id="turtle-form"' in r.text
+    assert "/static/css/theme.css" in r.text
+    assert r.headers["cache-control"] == "public, max-age=3600"
+    assert r.headers["content-encoding"] == "gzip"
+    assert client.get("/").content == r.content
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.content == r.content
+
+
+def test_static_asset_etag():
+    r = client.get("/static/css/theme.css")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/css")
+    # Unversioned URLs must revalidate; only the fingerprinted one from the page is immutable
+    assert r.headers["cache-control"] == "no-cache"
+    version = app.state.static_assets.versions["/css/theme.css"]
+    assert f"/static/css/theme.css?v={version}" in client.get("/").text
+    assert "immutable" in client.get(f"/static/css/theme.css?v={version}").headers["cache-control"]
+    r2 = client.get("/static/css/theme.css", headers={"If-None-Match": r.headers["etag"]})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    assert client.get("/static/css/missing.css").status_code == 404
+
+
+def test_visualize_large_graph_disables_physics(monkeypatch):
+    monkeypatch.setattr(settings, "physics_max_nodes", 2)
+    ttl = "@prefix ex: <http://example.org/> . ex:a ex:b ex:c . ex:c ex:b ex:d ."
+    r = client.post("/api/visualize", data={"turtle": ttl})
+    assert r.status_code == 200
+    assert '"enabled": false' in r.text
+    assert "Physics: off" in r.text
+
+
+def test_visualize_reuses_cached_render():
+    ttl = "@prefix ex: <http://example.org/> . ex:cached ex:b ex:c ."
+    hits = _render_cached.cache_info().hits
+    first = client.post("/api/visualize", data={"turtle": ttl})
+    second = client.post("/api/visualize", data={"turtle": ttl})
+    assert first.status_code == second.status_code == 200
+    assert first.text == second.text
+    assert _render_cached.cache_info().hits == hits + 1